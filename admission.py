@@ -0,0 +1,94 @@
+"""Admission Control: begrenzte FIFO-Warteschlange vor der Anmeldung.
+
+Eigenes Modul, damit alle Seiten dieselbe Warteschlange (und damit dieselbe Reihenfolge) nutzen.
+"""
+import asyncio
+import itertools
+import time
+
+from nicegui import background_tasks, run
+
+from monitoring import get_stage_histogram
+
+
+class AdmissionTicket:
+    def __init__(self, seq, daten):
+        self.seq = seq
+        self.daten = daten
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.perf_counter()
+
+
+class AdmissionController:
+    """Begrenzte FIFO-Warteschlange: Plätze werden strikt in der Reihenfolge der Anmeldungen vergeben.
+    Platzprüfung und Sheet-Eintrag laufen seriell in einem Worker (kein Überbuchen, schonend für die
+    Google-Quota), der E-Mail-Versand danach parallel mit begrenzter Anzahl gleichzeitiger Aufrufe.
+    """
+
+    def __init__(self):
+        self.max_queue = 0
+        self._queue = None
+        self._mail_slots = None
+        self._seq = itertools.count(1)
+        self._current_seq = 0
+        self._avg_service = 3.0  # Sekunden, gleitender Mittelwert (Startwert geschätzt)
+
+    async def run(self, reserve, send_mails, max_queue, mail_concurrency):
+        """Worker-Task, wird beim App-Start gestartet.
+
+        reserve(daten):    prüft Kapazität und schreibt ins Sheet, False = ausgebucht (läuft seriell)
+        send_mails(daten): versendet die Mails (läuft parallel, max. mail_concurrency gleichzeitig)
+
+        Ergebnis im Ticket: 'ok', 'ausgebucht' oder 'mail_fehler' (gespeichert, Mails fehlen);
+        Fehler beim Speichern werden als Exception weitergereicht.
+        """
+        self.max_queue = max_queue
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._mail_slots = asyncio.Semaphore(mail_concurrency)
+        print(f'🚦 Admission Control aktiv (max. {max_queue} wartende Anmeldungen).')
+        while True:
+            ticket = await self._queue.get()
+            self._current_seq = ticket.seq
+            get_stage_histogram('warteschlange').record((time.perf_counter() - ticket.enqueued) * 1000)
+            start = time.perf_counter()
+            try:
+                ergebnis = await run.io_bound(reserve, ticket.daten)
+            except Exception as e:
+                ticket.future.set_exception(e)
+                continue
+            finally:
+                self._avg_service = 0.8 * self._avg_service + 0.2 * (time.perf_counter() - start)
+                self._queue.task_done()
+            if ergebnis:
+                # background_tasks hält eine Referenz, damit der Task nicht vorzeitig eingesammelt wird
+                background_tasks.create(self._send_mails(ticket, send_mails), name='anmelde-mails')
+            else:
+                ticket.future.set_result('ausgebucht')
+
+    async def _send_mails(self, ticket, send_mails):
+        async with self._mail_slots:
+            try:
+                await run.io_bound(send_mails, ticket.daten)
+                ticket.future.set_result('ok')
+            except Exception as e:
+                # Platz ist bereits vergeben – nur die Mails fehlen (recover.py holt sie nach)
+                print(f'❌ Mailversand fehlgeschlagen: {e}')
+                ticket.future.set_result('mail_fehler')
+
+    def submit(self, daten):
+        """Reiht eine Anmeldung ein. Gibt None zurück, wenn die Warteschlange voll ist (Lastabwurf)."""
+        if self._queue is None or self._queue.full():
+            return None
+        ticket = AdmissionTicket(next(self._seq), daten)
+        self._queue.put_nowait(ticket)
+        return ticket
+
+    def position(self, ticket):
+        """0 = wird gerade bearbeitet, 1 = als Nächstes dran, ..."""
+        return max(0, ticket.seq - self._current_seq)
+
+    def eta_seconds(self, ticket):
+        return (self.position(ticket) + 1) * self._avg_service
+
+
+ADMISSION = AdmissionController()
@@ -0,0 +1,202 @@
+# =========================
+#   ANMELDE-JOURNAL (append-only, eine JSON-Zeile pro Ereignis)
+# =========================
+"""Protokolliert jeden Anmeldeversuch und den Status jeder Stufe in einer lokalen Datei.
+
+Format (kompakt, eine Zeile pro Ereignis):
+    {"t":"a","id":"…","d":{…Formulardaten inkl. Zeitstempel…}}     Anmeldeversuch
+    {"t":"s","id":"…","s":"sheet","st":"ok"}                      Stufenstatus
+    {"t":"s","id":"…","s":"bestaetigung","st":"fehler","e":"…"}   Stufe fehlgeschlagen
+
+Stufen: 'sheet' (Eintrag im Camp-Blatt), 'bestaetigung' (Mail an Teilnehmer),
+'benachrichtigung' (interne Mail). 'ausgebucht' bei 'sheet' beendet eine Anmeldung ohne Mails.
+
+Die gemeinsame Instanz JOURNAL wird von app.py und recover.py verwendet. Abgeschlossene
+Anmeldungen werden mit compact() (recover.py --compact) nach einer Frist wieder entfernt.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+STAGES = ('sheet', 'bestaetigung', 'benachrichtigung')
+STATUS_OK = 'ok'
+STATUS_FEHLER = 'fehler'
+STATUS_AUSGEBUCHT = 'ausgebucht'
+
+
+class ReplayableError(Exception):
+    """Eine Stufe ist fehlgeschlagen, die Anmeldung steht aber im Journal – recover.py holt sie nach."""
+
+
+class RegistrationJournal:
+    """Thread-sicheres Append-only-Journal. Schreibfehler werden nur geloggt –
+    das Journal darf eine Anmeldung niemals blockieren.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _append(self, record):
+        """Hängt einen Eintrag an. Gibt False zurück, wenn das Journal nicht beschreibbar war."""
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'ab+') as f:
+                    # Nach einem Absturz kann die letzte Zeile abgeschnitten sein – dann neue Zeile beginnen
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b'\n':
+                            line = b'\n' + line
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            print(f'⚠️ Journal nicht beschreibbar ({self.path}): {e}')
+            return False
+        return True
+
+    def attempt(self, daten):
+        """Speichert die vollständigen Formulardaten eines neuen Anmeldeversuchs."""
+        return self._append({'t': 'a', 'id': daten['id'], 'd': daten})
+
+    def stage(self, registration_id, stage, status, error=None):
+        record = {'t': 's', 'id': registration_id, 's': stage, 'st': status}
+        if error:
+            record['e'] = str(error)[:300]
+        self._append(record)
+
+
+def iter_records(path):
+    """Liest das Journal zeilenweise (streamend). Defekte Zeilen, z. B. eine
+    abgeschnittene letzte Zeile nach einem Absturz, werden übersprungen.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f'⚠️ Journal-Zeile {line_no} defekt – übersprungen.')
+
+
+def is_complete(done):
+    """done: dict Stufe → letzter Status."""
+    if done.get('sheet') == STATUS_AUSGEBUCHT:
+        return True
+    return all(done.get(stage) == STATUS_OK for stage in STAGES)
+
+
+def find_incomplete(path, since=None, until=None):
+    """Sucht unvollständige Anmeldungen. Im Speicher bleiben nur offene Einträge,
+    abgeschlossene werden sofort verworfen – auch große Journale passen so in den RAM.
+    since/until begrenzen den Zeitraum (Zeitstempel der Anmeldung).
+
+    Gibt eine Liste von (daten, done) in Journal-Reihenfolge zurück.
+    """
+    offen = {}
+    for record in iter_records(path):
+        registration_id = record.get('id')
+        if record.get('t') == 'a':
+            daten = record.get('d') or {}
+            zeitpunkt = _parse_zeitstempel(daten.get('zeitstempel'))
+            if (since and zeitpunkt < since) or (until and zeitpunkt > until):
+                continue
+            offen[registration_id] = (daten, {})
+        elif record.get('t') == 's' and registration_id in offen:
+            done = offen[registration_id][1]
+            # Ein einmal erfolgreicher Status wird von späteren Fehlversuchen nicht überschrieben
+            if done.get(record['s']) != STATUS_OK:
+                done[record['s']] = record.get('st')
+            if is_complete(done):
+                del offen[registration_id]
+    return list(offen.values())
+
+
+def compact(path, older_than):
+    """Entfernt abgeschlossene Anmeldungen, deren Zeitstempel vor older_than liegt (AGB §9:
+    Daten nur zur Durchführung des Camps). Offene Anmeldungen bleiben für recover.py erhalten.
+
+    Liest zweimal streamend und schreibt in eine temporäre Datei, die das Journal dann ersetzt.
+    Zeilen, die die App währenddessen anhängt, werden vorher übernommen.
+    Gibt die Anzahl der entfernten Anmeldungen zurück.
+    """
+    size = os.path.getsize(path)
+
+    # 1. Durchlauf: alte Anmeldungen und ihren Stufenstatus sammeln
+    alt = {}
+    with open(path, 'rb') as f:
+        for line in _lines_upto(f, size):
+            record = _parse_line(line)
+            if record is None:
+                continue
+            registration_id = record.get('id')
+            if record.get('t') == 'a':
+                if _parse_zeitstempel((record.get('d') or {}).get('zeitstempel')) < older_than:
+                    alt[registration_id] = {}
+            elif record.get('t') == 's' and registration_id in alt:
+                done = alt[registration_id]
+                if done.get(record['s']) != STATUS_OK:
+                    done[record['s']] = record.get('st')
+    entfernen = {registration_id for registration_id, done in alt.items() if is_complete(done)}
+    if not entfernen:
+        return 0
+
+    # 2. Durchlauf: alles außer den entfernten Anmeldungen übernehmen, dann neu Angehängtes
+    tmp_path = path + '.tmp'
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        for line in _lines_upto(src, size):
+            record = _parse_line(line)
+            if record is None or record.get('id') not in entfernen:
+                dst.write(line)
+        while True:
+            chunk = src.read(1 << 16)
+            if not chunk:
+                break
+            dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp_path, path)
+    return len(entfernen)
+
+
+def _lines_upto(f, size):
+    """Liefert die Zeilen, die beim Start in der Datei standen (später Angehängtes bleibt im Dateiobjekt)."""
+    pos = 0
+    while pos < size:
+        line = f.readline()
+        if not line:
+            break
+        pos += len(line)
+        yield line
+
+
+def _parse_line(line):
+    try:
+        return json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def _parse_zeitstempel(value):
+    try:
+        return datetime.strptime(value, '%d.%m.%Y %H:%M:%S')
+    except (TypeError, ValueError):
+        return datetime.min
+
+
+def default_journal_path():
+    """JOURNAL_PATH aus der Umgebung, sonst 'journal_path' aus config.json (relativ zum Projektordner)."""
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(base_path, 'config.json'), 'r', encoding='utf-8') as f:
+        cfg = json.load(f)
+    return os.environ.get('JOURNAL_PATH') or os.path.join(base_path, cfg.get('journal_path', 'data/anmeldungen.journal'))
+
+
+JOURNAL = RegistrationJournal(default_journal_path())
@@ -1,5 +1,5 @@
 # ---------------- IMPORTS ----------------
-from nicegui import ui
+from nicegui import ui, app, run
 import gspread
 from google.oauth2.service_account import Credentials
 import smtplib
@@ -38,6 +38,13 @@ print('SMTP Port:', CFG['smtp_port'])
 print('SMTP User:', CFG['smtp_user'])
 print('SMTP Passwort erkannt:' if SMTP_PASSWORD else '⚠️ Kein SMTP Passwort gefunden!')
 
+# =========================
+#   PERFORMANCE-MONITORING (siehe monitoring.py)
+# =========================
+import time
+import asyncio
+from monitoring import STAGE_STATS, PROFILER, measure_stage, monitor_loop_lag, admin_access_ok
+
 # =========================
 #   GOOGLE SHEETS VERBINDUNG
 # =========================
@@ -64,15 +71,18 @@ except Exception as e:
 # =========================
 #   CAMPS AUTOMATISCH LADEN (ohne Verwaltungsblätter)
 # =========================
-def get_camp_names():
-    """Lädt automatisch alle Camp-Blätter, schließt aber Verwaltungsblätter wie 'Camp-Preise' aus."""
+def get_camp_names(titles=None):
+    """Lädt automatisch alle Camp-Blätter, schließt aber Verwaltungsblätter wie 'Camp-Preise' aus.
+    Optional können bereits bekannte Blattnamen übergeben werden (kein zusätzlicher API-Aufruf).
+    """
     try:
-        worksheets = SPREADSHEET.worksheets()
+        if titles is None:
+            titles = [ws.title for ws in SPREADSHEET.worksheets()]
         exclude = {'Camp-Preise', 'Preise', 'Config', 'Einstellungen'}
         camp_names = [
-            ws.title.strip()
-            for ws in worksheets
-            if ws.title.strip() and ws.title.strip() not in exclude
+            title.strip()
+            for title in titles
+            if title.strip() and title.strip() not in exclude
         ]
         camp_names = sorted(set(camp_names))
         print(f'📋 Gefundene Camps: {camp_names}')
@@ -84,11 +94,15 @@ def get_camp_names():
 # =========================
 #   CAMP-PREISE LADEN UND BEREINIGEN
 # =========================
-def get_camp_prices():
+def get_price_sheet_values():
+    """Lädt den Inhalt von 'Camp-Preise' genau einmal (Preise, Kapazitäten und Bilder stehen im selben Blatt)."""
+    return SPREADSHEET.worksheet('Camp-Preise').get_all_values()
+
+def get_camp_prices(data=None):
     """Liest 'Camp-Preise' und konvertiert z. B. '1.140,00€' → 1140.00 (float)."""
     try:
-        sheet = SPREADSHEET.worksheet('Camp-Preise')
-        data = sheet.get_all_values()
+        if data is None:
+            data = get_price_sheet_values()
 
         prices = {}
         for row in data[1:]:  # erste Zeile ist Überschrift
@@ -122,13 +136,13 @@ def get_camp_prices():
 # =========================
 #   CAMP-BILDER LADEN
 # =========================
-def get_camp_images():
+def get_camp_images(data=None):
     """Liest Bildpfade oder URLs aus dem Sheet 'Camp-Preise' (Spalte 4).
     Unterstützt lokale Bilder im Ordner 'static/images' UND externe Links (z. B. https://...).
     """
     try:
-        sheet = SPREADSHEET.worksheet('Camp-Preise')
-        data = sheet.get_all_values()
+        if data is None:
+            data = get_price_sheet_values()
         images = {}
         for row in data[1:]:
             if len(row) >= 4 and row[0].strip() and row[3].strip():
@@ -158,11 +172,11 @@ def get_camp_images():
 # =========================
 #   CAMP-KAPAZITÄTEN UND VERFÜGBARKEIT
 # =========================
-def get_camp_capacities():
+def get_camp_capacities(data=None):
     """Liest die maximale Teilnehmerzahl je Camp aus dem Sheet 'Camp-Preise'."""
     try:
-        sheet = SPREADSHEET.worksheet('Camp-Preise')
-        data = sheet.get_all_values()
+        if data is None:
+            data = get_price_sheet_values()
         capacities = {}
         for row in data[1:]:
             if len(row) >= 3 and row[0].strip():
@@ -178,23 +192,166 @@ def get_camp_capacities():
         return {}
 
 def get_registered_count(camp_name):
-    """Zählt, wie viele Teilnehmer bereits im jeweiligen Camp eingetragen sind."""
+    """Zählt, wie viele Teilnehmer bereits im jeweiligen Camp eingetragen sind.
+    API-Fehler (z. B. 429) werden weitergereicht – sonst würde ein Quota-Fehler als "0 Anmeldungen" gelten.
+    """
     try:
         worksheet = SPREADSHEET.worksheet(camp_name)
-        data = worksheet.get_all_values()
-        return max(0, len(data) - 1)  # minus Headerzeile
-    except Exception:
+    except gspread.exceptions.WorksheetNotFound:
         return 0
+    data = worksheet.get_all_values()
+    return max(0, len(data) - 1)  # minus Headerzeile
 
 def is_camp_full(camp_name):
     """Prüft, ob das Camp ausgebucht ist."""
-    caps = get_camp_capacities()
-    max_cap = caps.get(camp_name)
+    max_cap = CATALOG['caps'].get(camp_name)
     current = get_registered_count(camp_name)
     if not max_cap:
         return False
     return current >= max_cap
 
+# =========================
+#   CAMP-KATALOG (Change-Feed statt Laden bei jedem Aufruf)
+# =========================
+from catalog import CATALOG, REVISION as CATALOG_REVISION, diff_catalog, publish as publish_catalog
+import catalog
+
+CATALOG_POLL_SECONDS = CFG.get('catalog_poll_seconds', 30)
+
+
+def fetch_catalog_revision():
+    """Holt nur Metadaten: Änderungszeitpunkt (Drive) und Blattnamen – ohne Zelleninhalte."""
+    modified = SPREADSHEET.get_lastUpdateTime()
+    metadata = SPREADSHEET.fetch_sheet_metadata(params={'fields': 'sheets.properties.title'})
+    titles = tuple(sheet['properties']['title'] for sheet in metadata.get('sheets', []))
+    return modified, titles
+
+
+def load_catalog(titles=None, data=None):
+    """Baut den Katalog aus einem einzigen Lesevorgang von 'Camp-Preise' auf."""
+    if data is None:
+        data = get_price_sheet_values()
+    return {
+        'names': get_camp_names(titles),
+        'prices': get_camp_prices(data),
+        'caps': get_camp_capacities(data),
+        'images': get_camp_images(data),
+    }
+
+
+def check_catalog_changes():
+    """Prüft die Metadaten und liest 'Camp-Preise' nur neu, wenn sich etwas geändert hat.
+    Gibt den neuen Katalog zurück oder None, wenn sich inhaltlich nichts geändert hat.
+    """
+    modified, titles = fetch_catalog_revision()
+    if modified == CATALOG_REVISION['modified'] and titles == CATALOG_REVISION['titles']:
+        return None
+
+    # Jede neue Anmeldung ändert ebenfalls den Zeitstempel – daher nur den Katalog neu lesen und vergleichen.
+    # Die Revision wird erst nach erfolgreichem Laden übernommen, sonst würde ein Fehler nie nachgeholt.
+    new_catalog = load_catalog(titles)
+    CATALOG_REVISION.update(modified=modified, titles=titles)
+    changes = diff_catalog(CATALOG, new_catalog)
+    if not changes:
+        return None
+    print(f'🔄 Katalog geändert: {"; ".join(changes)}')
+    return new_catalog
+
+
+async def watch_catalog():
+    """Hintergrund-Task: pollt günstige Metadaten und überträgt Katalog-Änderungen an alle Clients."""
+    print(f'👀 Katalog-Watcher gestartet (alle {CATALOG_POLL_SECONDS} s).')
+    while True:
+        await asyncio.sleep(CATALOG_POLL_SECONDS)
+        try:
+            new_catalog = await run.io_bound(check_catalog_changes)
+        except Exception as e:
+            print(f'⚠️ Fehler beim Prüfen des Katalogs: {e}')
+            continue
+        if new_catalog is not None:
+            publish_catalog(new_catalog)
+
+
+try:
+    _modified, _titles = fetch_catalog_revision()
+    CATALOG.update(load_catalog(_titles))
+    CATALOG_REVISION.update(modified=_modified, titles=_titles)
+except Exception as e:
+    # Revision bleibt leer – der Watcher lädt den Katalog beim nächsten Durchlauf vollständig nach
+    print('⚠️ Fehler beim initialen Laden des Katalogs:', e)
+    CATALOG['names'] = get_camp_names()
+
+# =========================
+#   CAMP-STATISTIKEN (inkrementell + periodischer Abgleich)
+# =========================
+import camp_stats
+from camp_stats import record_registration
+
+EARLY_CARE_SURCHARGE = 15.0
+STATS_RECONCILE_SECONDS = CFG.get('stats_reconcile_seconds', 900)
+
+# Spaltenreihenfolge der Camp-Blätter (siehe save_to_sheet)
+COL_VORNAME, COL_NACHNAME, COL_ALTER, COL_ALLERGIEN, COL_FRUEH, COL_ZEITSTEMPEL = 0, 1, 2, 5, 6, 8
+
+
+def calc_price(camp_name, frueh_text):
+    """Grundpreis aus dem Katalog plus Aufschlag für Frühbetreuung ab 08:00 Uhr."""
+    base_price = CATALOG['prices'].get(camp_name, 0.0)
+    extra_price = EARLY_CARE_SURCHARGE if '08:00' in (frueh_text or '') else 0.0
+    return base_price, extra_price, base_price + extra_price
+
+
+def build_camp_stats():
+    """Liest alle Camp-Blätter und berechnet die Statistik vollständig neu (für den Abgleich).
+    Gibt (Statistik je Camp, Zeilenschlüssel je Camp) zurück; nicht lesbare Blätter fehlen darin.
+
+    Hinweis: Der Umsatz wird mit den *aktuellen* Katalogpreisen berechnet – wird ein Preis
+    geändert, ändert sich beim nächsten Abgleich auch der Umsatz bereits erfolgter Anmeldungen.
+    """
+    result, keys = {}, {}
+    for camp_name in CATALOG['names']:
+        try:
+            rows = SPREADSHEET.worksheet(camp_name).get_all_values()[1:]
+        except Exception as e:
+            print(f'⚠️ Statistik: Blatt {camp_name} nicht lesbar: {e}')
+            continue
+        stats = camp_stats.empty_camp_stats()
+        keys[camp_name] = set()
+        for row in rows:
+            row = row + [''] * (COL_ZEITSTEMPEL + 1 - len(row))
+            frueh = row[COL_FRUEH]
+            _, _, preis = calc_price(camp_name, frueh)
+            camp_stats.add_to_stats(
+                stats, row[COL_VORNAME], row[COL_NACHNAME], row[COL_ALTER],
+                frueh, row[COL_ALLERGIEN], preis
+            )
+            keys[camp_name].add(camp_stats.row_key(row[COL_VORNAME], row[COL_NACHNAME], row[COL_ZEITSTEMPEL]))
+        result[camp_name] = stats
+    return result, keys
+
+
+def reconcile_camp_stats():
+    """Ersetzt die inkrementelle Statistik durch den Stand der Sheets und meldet Abweichungen."""
+    camp_stats.begin_reconcile()
+    try:
+        fresh, keys = build_camp_stats()
+    except Exception:
+        camp_stats.abort_reconcile()
+        raise
+    camp_stats.finish_reconcile(fresh, keys)
+    print(f'📊 Camp-Statistik abgeglichen ({len(fresh)} Camps).')
+
+
+async def reconcile_stats_loop():
+    """Hintergrund-Task: gleicht die Statistik sofort und danach periodisch mit den Sheets ab."""
+    while True:
+        try:
+            await run.io_bound(reconcile_camp_stats)
+        except Exception as e:
+            print(f'⚠️ Fehler beim Abgleich der Camp-Statistik: {e}')
+        await asyncio.sleep(STATS_RECONCILE_SECONDS)
+
+
 # =========================
 #   E-MAIL SIGNATUR
 # =========================
@@ -271,12 +428,12 @@ def send_email(to_address: str, subject: str, body: str):
 # =========================
 #   ANMELDUNG / SHEET
 # =========================
-def save_to_sheet(camp_name, vorname, nachname, alter, telefon, email, frueh, allergien, anmerkung):
+def save_to_sheet(camp_name, vorname, nachname, alter, telefon, email, frueh, allergien, anmerkung, zeitstempel=None):
     """Speichert Anmeldedaten im richtigen Spaltenformat."""
-    zeitstempel = datetime.now().strftime('%d.%m.%Y %H:%M:%S')
+    zeitstempel = zeitstempel or datetime.now().strftime('%d.%m.%Y %H:%M:%S')
     try:
         worksheet = SPREADSHEET.worksheet(camp_name)
-    except Exception:
+    except gspread.exceptions.WorksheetNotFound:
         worksheet = SPREADSHEET.add_worksheet(title=camp_name, rows=100, cols=10)
         worksheet.append_row([
             "Vorname", "Nachname", "Alter", "Telefon", "E-Mail",
@@ -295,81 +452,149 @@ def save_to_sheet(camp_name, vorname, nachname, alter, telefon, email, frueh, al
     ])
 
 # =========================
-#   ANMELDUNGSPROZESS
+#   ADMISSION CONTROL (Warteschlange vor der Anmeldung)
 # =========================
-def anmelden():
-    def valid_email(x): return '@' in x and '.' in x
-    def valid_phone(x): return all(c.isdigit() or c in [' ', '+', '-', '(', ')'] for c in x) and len(x.strip()) >= 6
-
-    # Pflichtfelder prüfen
-    if not all([camp.value, vorname.value, nachname.value, alter.value, telefon.value, email.value, frueh.value]):
-        ui.notify('Bitte alle Pflichtfelder ausfüllen.', color='red'); return
-    if not alter.value.isdigit():
-        ui.notify('Alter bitte nur als Zahl angeben.', color='red'); return
-    if not valid_phone(telefon.value):
-        ui.notify('Ungültige Telefonnummer.', color='red'); return
-    if not valid_email(email.value):
-        ui.notify('Ungültige E-Mail-Adresse.', color='red'); return
-    if not agb_checkbox.value:
-        ui.notify('Bitte bestätige die AGB, bevor du fortfährst.', color='red'); return
-
-    # Teilnehmerbegrenzung prüfen
-    if is_camp_full(camp.value):
-        ui.notify(f'Das Camp "{camp.value}" ist bereits ausgebucht.', color='red')
-        return
+import admission
+from gspread.exceptions import APIError
+
+ADMISSION_QUEUE_MAX = CFG.get('admission_queue_max', 30)
+ADMISSION_MAIL_CONCURRENCY = CFG.get('admission_mail_concurrency', 4)
+SHEETS_RETRY_DELAYS = [2, 5, 10]  # Sekunden bei Google-Quota-Fehlern (HTTP 429)
+
 
+def with_sheets_retry(fn, *args):
+    """Wiederholt einen Sheets-Aufruf, wenn Google die Quote überschreitet (429 = Anfrage abgelehnt, sicher wiederholbar)."""
+    for delay in SHEETS_RETRY_DELAYS + [None]:
+        try:
+            return fn(*args)
+        except APIError as e:
+            if delay is None or getattr(e, 'code', None) != 429:
+                raise
+            print(f'⏳ Google-Quota erreicht – neuer Versuch in {delay} s.')
+            time.sleep(delay)
+
+
+ADMISSION = admission.ADMISSION
+
+# =========================
+#   ANMELDE-JOURNAL (Wiederherstellung mit recover.py)
+# =========================
+import uuid
+from anmelde_journal import JOURNAL, STATUS_OK, STATUS_FEHLER, STATUS_AUSGEBUCHT, ReplayableError
+
+
+def run_journaled_stage(daten, stage, fn, *args):
+    """Führt eine Stufe aus und hält Erfolg oder Fehler im Journal fest."""
     try:
-        # Frühbetreuung + Preis
-        frueh_text = frueh.value if frueh.value else 'Keine'
-
-        camp_prices = get_camp_prices()
-        base_price = camp_prices.get(camp.value, 0.0)
-
-        extra_price = 15.0 if '08:00' in frueh_text else 0.0
-        total_price = base_price + extra_price
-
-        # Speicherung in Sheet
-        save_to_sheet(
-            camp.value,
-            vorname.value.strip(),
-            nachname.value.strip(),
-            alter.value.strip(),
-            telefon.value.strip(),
-            email.value.strip(),
-            frueh_text,
-            allergien.value.strip() or 'Keine',
-            anmerkung.value.strip() or '-'
+        result = fn(*args)
+    except Exception as e:
+        JOURNAL.stage(daten['id'], stage, STATUS_FEHLER, e)
+        raise
+    JOURNAL.stage(daten['id'], stage, STATUS_OK)
+    return result
+
+# =========================
+#   ANMELDUNGSPROZESS
+# =========================
+def write_registration(daten):
+    """Trägt die Anmeldung ins Camp-Blatt ein (Zeitstempel aus dem Journal, damit Wiederholungen erkennbar bleiben)."""
+    with measure_stage('save_to_sheet'):
+        with_sheets_retry(
+            save_to_sheet,
+            daten['camp'],
+            daten['vorname'],
+            daten['nachname'],
+            daten['alter'],
+            daten['telefon'],
+            daten['email'],
+            daten['frueh'],
+            daten['allergien'],
+            daten['anmerkung'],
+            daten.get('zeitstempel')
         )
 
-        # Bestätigung an Teilnehmer
+
+def reserve_place(daten):
+    """Prüft die Kapazität und trägt die Anmeldung ein (läuft seriell im Admission-Worker).
+    Gibt False zurück, wenn das Camp inzwischen ausgebucht ist. Scheitert eine Anmeldung, die
+    bereits im Journal steht, kommt ReplayableError – recover.py holt sie nach.
+    """
+    # Erst hier ins Journal: fsync läuft im Worker-Thread statt auf dem Event-Loop, und
+    # wegen voller Warteschlange abgewiesene Anmeldungen landen gar nicht erst im Journal
+    journaliert = JOURNAL.attempt(daten)
+    try:
+        with measure_stage('is_camp_full'):
+            voll = with_sheets_retry(is_camp_full, daten['camp'])
+        if voll:
+            JOURNAL.stage(daten['id'], 'sheet', STATUS_AUSGEBUCHT)
+            return False
+
+        run_journaled_stage(daten, 'sheet', write_registration, daten)
+    except Exception as e:
+        if journaliert:
+            print(f'❌ Sheet-Eintrag fehlgeschlagen, steht im Journal (recover.py): {e}')
+            raise ReplayableError(e) from e
+        raise
+    _, _, total_price = calc_price(daten['camp'], daten['frueh'])
+    record_registration(
+        daten['camp'],
+        daten['vorname'],
+        daten['nachname'],
+        daten['alter'],
+        daten['frueh'],
+        daten['allergien'],
+        total_price,
+        daten['zeitstempel']
+    )
+    return True
+
+
+def send_registration_mails(daten):
+    """Versendet Bestätigung an den Teilnehmer und interne Benachrichtigung.
+    Schlägt eine Mail fehl, wird die andere trotzdem versucht; der erste Fehler wird weitergereicht.
+    """
+    fehler = None
+    for stage, fn in (('bestaetigung', send_confirmation_mail), ('benachrichtigung', send_notification_mail)):
+        try:
+            run_journaled_stage(daten, stage, fn, daten)
+        except Exception as e:
+            fehler = fehler or e
+    if fehler:
+        raise fehler
+
+
+def send_confirmation_mail(daten):
+    """Bestätigung an den Teilnehmer."""
+    base_price, extra_price, total_price = calc_price(daten['camp'], daten['frueh'])
+    with measure_stage('send_email_bestaetigung'):
         send_email(
-            email.value,
+            daten['email'],
             'Anmeldebestätigung Fußballcamp',
-f"""Hallo {vorname.value},
+f"""Hallo {daten['vorname']},
 
 vielen Dank für deine Anmeldung zum Fußballcamp! ⚽
 Wir haben deine Daten erhalten und freuen uns auf dich.
 
 📋 CAMP-DATEN
-Camp: {camp.value}
+Camp: {daten['camp']}
 
 👤 TEILNEHMER
-Vorname: {vorname.value}
-Nachname: {nachname.value}
-Alter: {alter.value}
+Vorname: {daten['vorname']}
+Nachname: {daten['nachname']}
+Alter: {daten['alter']}
 
 📞 KONTAKT
-Telefon (Notfall): {telefon.value}
-E-Mail: {email.value}
+Telefon (Notfall): {daten['telefon']}
+E-Mail: {daten['email']}
 
 🕗 FRÜHBETREUUNG
-{frueh_text}
+{daten['frueh']}
 
 ⚕️ ALLERGIEN / BESONDERHEITEN
-{allergien.value or 'Keine'}
+{daten['allergien']}
 
 🗒️ ANMERKUNG
-{anmerkung.value or '-'}
+{daten['anmerkung']}
 
 💶 KOSTENÜBERSICHT
 Grundpreis: {base_price:.2f} €
@@ -377,7 +602,7 @@ Grundpreis: {base_price:.2f} €
 ----------------------------
 Gesamtbetrag: {total_price:.2f} €
 
-📅 Eingegangen am: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}
+📅 Eingegangen am: {daten.get('zeitstempel') or datetime.now().strftime('%d.%m.%Y %H:%M:%S')}
 
 Sollte dir ein Fehler auffallen, antworte einfach auf diese Mail und teile uns die Korrektur mit.
 
@@ -389,53 +614,36 @@ Viele Grüße,
 {EMAIL_SIGNATURE}"""
         )
 
-        # Interne Benachrichtigung
+
+def send_notification_mail(daten):
+    """Interne Benachrichtigung an die Fußballschule."""
+    base_price, extra_price, total_price = calc_price(daten['camp'], daten['frueh'])
+    with measure_stage('send_email_benachrichtigung'):
         send_email(
             CFG['school_notify_to'],
-            f'Neue Anmeldung: {vorname.value} {nachname.value}',
+            f"Neue Anmeldung: {daten['vorname']} {daten['nachname']}",
 f"""Neue Anmeldung für das Fußballcamp!
 
-Vorname: {vorname.value}
-Nachname: {nachname.value}
-Camp: {camp.value}
-Alter: {alter.value}
-Telefon (Notfall): {telefon.value}
-E-Mail: {email.value}
-Frühbetreuung: {frueh_text}
-Allergien/Besonderheiten: {allergien.value or 'Keine'}
-Anmerkung: {anmerkung.value or '-'}
+Vorname: {daten['vorname']}
+Nachname: {daten['nachname']}
+Camp: {daten['camp']}
+Alter: {daten['alter']}
+Telefon (Notfall): {daten['telefon']}
+E-Mail: {daten['email']}
+Frühbetreuung: {daten['frueh']}
+Allergien/Besonderheiten: {daten['allergien']}
+Anmerkung: {daten['anmerkung']}
 
 💶 Preisübersicht:
 Grundpreis: {base_price:.2f} €
 {'Frühbetreuung: +15,00 €' if extra_price else ''}
 Gesamtbetrag: {total_price:.2f} €
 
-Zeit: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}
+Zeit: {daten.get('zeitstempel') or datetime.now().strftime('%d.%m.%Y %H:%M:%S')}
 
 {EMAIL_SIGNATURE}"""
         )
 
-        ui.notify(
-            f'✅ Anmeldung für {vorname.value} {nachname.value} gespeichert & Mails versendet.',
-            color='green'
-        )
-
-        # Felder zurücksetzen
-        vorname.value = ''
-        nachname.value = ''
-        alter.value = ''
-        telefon.value = ''
-        email.value = ''
-        allergien.value = ''
-        anmerkung.value = ''
-        frueh.value = 'Keine'
-
-        # Status neu berechnen (z. B. evtl. jetzt ausgebucht)
-        update_camp_status()
-
-    except Exception as e:
-        ui.notify(f'❌ Fehler: {e}', color='red')
-        print(e)
 
 # =========================
 #   DESIGN
@@ -548,188 +756,445 @@ hr {
   color: #000 !important;
 }
 </style>
-""")
+""", shared=True)
 
 # =========================
 #   UI
 # =========================
-with ui.column().classes('items-center w-full text-center mt-12'):
+@ui.page('/')
+def index():
+    """Anmeldeformular – wird für jeden Besucher neu aufgebaut (eigene Eingabefelder je Client)."""
+
+    # Ticket der laufenden Anmeldung dieser Seite – solange es wartet, wird kein zweites eingereiht
+    pending = {'ticket': None}
+
+    async def anmelden():
+        if pending['ticket'] is not None:
+            return
+
+        def valid_email(x): return '@' in x and '.' in x
+        def valid_phone(x): return all(c.isdigit() or c in [' ', '+', '-', '(', ')'] for c in x) and len(x.strip()) >= 6
+
+        # Pflichtfelder prüfen
+        if not all([camp.value, vorname.value, nachname.value, alter.value, telefon.value, email.value, frueh.value]):
+            ui.notify('Bitte alle Pflichtfelder ausfüllen.', color='red'); return
+        if not alter.value.isdigit():
+            ui.notify('Alter bitte nur als Zahl angeben.', color='red'); return
+        if not valid_phone(telefon.value):
+            ui.notify('Ungültige Telefonnummer.', color='red'); return
+        if not valid_email(email.value):
+            ui.notify('Ungültige E-Mail-Adresse.', color='red'); return
+        if not agb_checkbox.value:
+            ui.notify('Bitte bestätige die AGB, bevor du fortfährst.', color='red'); return
+
+        # Formularstand einfrieren – die Verarbeitung läuft später im Worker
+        daten = {
+            'id': uuid.uuid4().hex,
+            'zeitstempel': datetime.now().strftime('%d.%m.%Y %H:%M:%S'),
+            'camp': camp.value,
+            'vorname': vorname.value.strip(),
+            'nachname': nachname.value.strip(),
+            'alter': alter.value.strip(),
+            'telefon': telefon.value.strip(),
+            'email': email.value.strip(),
+            'frueh': frueh.value if frueh.value else 'Keine',
+            'allergien': allergien.value.strip() or 'Keine',
+            'anmerkung': anmerkung.value.strip() or '-',
+        }
+
+        ticket = ADMISSION.submit(daten)
+        if ticket is None:
+            ui.notify(
+                'Gerade melden sich sehr viele gleichzeitig an. Bitte versuche es in einer Minute erneut.',
+                color='red'
+            )
+            return
+        pending['ticket'] = ticket
+        submit_btn.disable()
 
-    # Vereinslogo
-    ui.image('https://upload.wikimedia.org/wikipedia/en/f/fe/Bremer_SV_logo.png').style(
-        'width:150px; margin-bottom:10px;'
-    )
+        try:
+            with measure_stage('anmelden_gesamt'):
+                while not ticket.future.done():
+                    position = ADMISSION.position(ticket)
+                    if position:
+                        queue_label.text = (
+                            f'⏳ Du bist auf Platz {position} der Warteschlange '
+                            f'(ca. {ADMISSION.eta_seconds(ticket):.0f} s).'
+                        )
+                    else:
+                        queue_label.text = '⏳ Deine Anmeldung wird bearbeitet...'
+                    await asyncio.wait([ticket.future], timeout=1)
+                ergebnis = ticket.future.result()
+        except ReplayableError:
+            ergebnis = 'nachholen'
+        except Exception as e:
+            queue_label.text = ''
+            ui.notify(f'❌ Fehler: {e}', color='red')
+            print(e)
+            return
+        finally:
+            pending['ticket'] = None
+            submit_btn.enable()
+
+        queue_label.text = ''
+        if ergebnis == 'ausgebucht':
+            ui.notify(f'Das Camp "{daten["camp"]}" ist bereits ausgebucht.', color='red')
+            await refresh_camp_status()
+            return
+
+        if ergebnis == 'nachholen':
+            # Steht im Journal und wird nachgetragen – nicht erneut absenden lassen, sonst entsteht eine Doppelanmeldung
+            ui.notify(
+                f'📝 Anmeldung für {daten["vorname"]} {daten["nachname"]} ist eingegangen und wird in Kürze eingetragen. '
+                'Die Bestätigung kommt danach per E-Mail – bitte nicht erneut anmelden.',
+                color='orange'
+            )
+        elif ergebnis == 'mail_fehler':
+            # Platz ist gespeichert – nicht erneut absenden lassen, sonst entsteht eine Doppelanmeldung
+            ui.notify(
+                f'✅ Anmeldung für {daten["vorname"]} {daten["nachname"]} gespeichert. '
+                'Die Bestätigungsmail kommt mit etwas Verzögerung – bitte nicht erneut anmelden.',
+                color='green'
+            )
+        else:
+            ui.notify(
+                f'✅ Anmeldung für {daten["vorname"]} {daten["nachname"]} gespeichert & Mails versendet.',
+                color='green'
+            )
+
+        # Felder zurücksetzen
+        vorname.value = ''
+        nachname.value = ''
+        alter.value = ''
+        telefon.value = ''
+        email.value = ''
+        allergien.value = ''
+        anmerkung.value = ''
+        frueh.value = 'Keine'
+
+        # Status neu berechnen (z. B. evtl. jetzt ausgebucht)
+        await refresh_camp_status()
+
+    with ui.column().classes('items-center w-full text-center mt-12'):
+
+        # Vereinslogo
+        ui.image('https://upload.wikimedia.org/wikipedia/en/f/fe/Bremer_SV_logo.png').style(
+            'width:150px; margin-bottom:10px;'
+        )
+
+        # Kopfbereich
+        with ui.column().classes('mainblock'):
+            ui.label('⚽ Fußballcamp Anmeldung').classes('text-4xl font-bold')
+            ui.html('<hr>', sanitize=False)
+            ui.label('Bitte tragt eure Daten vollständig ein.').classes('text-lg')
+
+       # === CAMP-AUSWAHL ===
+    with ui.column().classes('campblock'):
+        ui.label('🏕️ Camp-Auswahl').classes('text-3xl font-bold mb-2')
+
+        camp_names = CATALOG['names'] or ['Camp-Auswahl']
+
+        camp = ui.select(
+            camp_names,
+            value=camp_names[0] if camp_names else None,
+            label='Camp'
+        ).classes('w-full text-lg required')
+
+        camp_status_label = ui.label('').classes('text-lg mt-2 font-bold text-red-700')
+        camp_preis_label = ui.label('').classes('text-lg mt-1 text-blue-800 font-bold')
+
+        # 🖼️ Camp-Bild (automatisch je nach Auswahl)
+        camp_image = ui.image().classes('w-full rounded-xl shadow-lg mt-4').style(
+            'max-width:500px; border-radius:1rem; display:block; margin:auto; transition:opacity 0.6s ease-in-out;'
+        )
+        camp_image.visible = False  # erst sichtbar, wenn Auswahl getroffen wurde
 
-    # Kopfbereich
-    with ui.column().classes('mainblock'):
-        ui.label('⚽ Fußballcamp Anmeldung').classes('text-4xl font-bold')
         ui.html('<hr>', sanitize=False)
-        ui.label('Bitte tragt eure Daten vollständig ein.').classes('text-lg')
 
-   # === CAMP-AUSWAHL ===
-with ui.column().classes('campblock'):
-    ui.label('🏕️ Camp-Auswahl').classes('text-3xl font-bold mb-2')
+        # === TEILNEHMERDATEN & AGB ===
+        with ui.column().classes('mainblock mt-2'):
+            with ui.row():
+                vorname = ui.input('Vorname').classes('w-full required')
+                nachname = ui.input('Nachname').classes('w-full required')
+            with ui.row():
+                alter = ui.input('Alter').classes('w-full required')
+                telefon = ui.input('Telefonnummer (Notfall)').classes('w-full required')
+            with ui.row():
+                email = ui.input('E-Mail (für Bestätigung)').classes('w-full required')
+                frueh = ui.select(
+                    ['Keine', 'ab 08:00 Uhr (plus 15 Euro)'],
+                    value='Keine',
+                    label='Frühbetreuung'
+                ).classes('w-full required')
+
+            allergien = ui.input('Allergien / Besonderheiten').classes('w-full')
+            anmerkung = ui.input('Anmerkung').classes('w-full')
+
+            ui.label('* Pflichtfelder').style('color: red; font-size: 0.9rem; margin-top: 0.5rem;')
+
+            # === AGB ===
+            agb_checkbox = ui.checkbox('Ich habe die AGB gelesen und akzeptiere sie.').classes('required')
+            agb_expansion = ui.expansion('📄 AGB ausklappen').classes('w-full mt-2 text-blue-900 font-semibold')
+            with agb_expansion:
+                ui.markdown("""
+    **für die Teilnahme an Fußballcamps der Fußballschule Bremer SV**
+
+    1. **Veranstalter**  
+    Veranstalter der Fußballcamps ist die Fußballschule Bremer SV, Hohweg 48–50, 28219 Bremen (nachfolgend „Veranstalter“ genannt).
+
+    2. **Anmeldung und Vertragsschluss**  
+    Die Anmeldung erfolgt über das Online-Formular oder schriftlich.  
+    Mit der Bestätigung durch den Veranstalter (per E-Mail) kommt der Teilnahmevertrag zustande.  
+    Die Teilnahmeplätze werden in der Reihenfolge der Anmeldungen vergeben.
+
+    3. **Teilnahmegebühr und Zahlung**  
+    Die Teilnahmegebühr ist dem jeweiligen Camp-Angebot zu entnehmen.  
+    Die Zahlung erfolgt gemäß der in der Anmeldebestätigung genannten Zahlungsweise (z. B. Barzahlung am ersten Camptag oder Überweisung vorab).  
+    Eine Teilnahme ist nur bei vollständiger Zahlung möglich.
+
+    4. **Rücktritt / Stornierung durch Teilnehmer**  
+    Ein Rücktritt ist bis 14 Tage vor Campbeginn kostenfrei möglich.  
+    Bei späterer Absage bis 7 Tage vor Beginn werden 50 % der Teilnahmegebühr fällig.  
+    Bei Absage innerhalb von 7 Tagen vor Campbeginn oder Nichterscheinen ist der volle Betrag zu zahlen.  
+    Eine Erstattung bei vorzeitigem Abbruch des Camps ist ausgeschlossen.
+
+    5. **Absage oder Änderung durch den Veranstalter**  
+    Der Veranstalter behält sich vor, das Camp aus wichtigen Gründen (z. B. zu geringe Teilnehmerzahl, Krankheit, höhere Gewalt, behördliche Anordnung) abzusagen oder zu verschieben.  
+    In diesem Fall wird die Teilnahmegebühr vollständig erstattet. Weitere Ansprüche bestehen nicht.
+
+    6. **Haftung**  
+    Die Teilnahme erfolgt auf eigene Gefahr.  
+    Der Veranstalter haftet nur für Schäden, die auf vorsätzliches oder grob fahrlässiges Verhalten seiner Mitarbeiter oder Erfüllungsgehilfen zurückzuführen sind.  
+    Für mitgebrachte Gegenstände, Kleidung oder Wertsachen wird keine Haftung übernommen.  
+    Eine private Unfall- und Haftpflichtversicherung wird empfohlen.
+
+    7. **Gesundheitszustand**  
+    Mit der Anmeldung bestätigen die Erziehungsberechtigten, dass das Kind körperlich gesund und sportlich belastbar ist.  
+    Eventuelle gesundheitliche Einschränkungen, Allergien oder notwendige Medikamente sind bei der Anmeldung anzugeben.
+
+    8. **Foto- und Videoaufnahmen**  
+    Während der Camps können Foto- und Videoaufnahmen gemacht werden.  
+    Diese dürfen vom Veranstalter für Vereinszwecke, Berichterstattung und Öffentlichkeitsarbeit (z. B. Website, Social Media, Printmedien) verwendet werden.  
+    Sollte dies nicht gewünscht sein, ist der Veranstalter vor Campbeginn schriftlich zu informieren.
+
+    9. **Datenschutz**  
+    Die erhobenen Daten werden ausschließlich zur Durchführung des Camps und zur Kommunikation im Rahmen der Veranstaltung genutzt.  
+    Eine Weitergabe an Dritte erfolgt nicht.  
+    Weitere Informationen zum Datenschutz sind in der Datenschutzerklärung unter www.bremer-sv.de/datenschutz abrufbar.
+
+    10. **Salvatorische Klausel**  
+    Sollten einzelne Bestimmungen dieser AGB unwirksam sein, bleibt die Wirksamkeit der übrigen Bestimmungen unberührt.
+
+    11. **Gerichtsstand**  
+    Es gilt deutsches Recht. Gerichtsstand ist – soweit zulässig – Bremen.
+
+    📅 *Stand: Oktober 2025*  
+    *Fußballschule Bremer SV – gemeinsam kicken, lernen, wachsen.*
+                """).classes('text-sm leading-relaxed text-left')
+
+            # === ABSENDEN ===
+            submit_btn = ui.button('JETZT ANMELDEN', on_click=anmelden).classes('button w-full mt-4')
+            submit_btn.bind_enabled_from(agb_checkbox, 'value')
+            queue_label = ui.label('').classes('text-md mt-2 font-bold text-blue-800')
+
+            ui.label('💡 Sollte keine Bestätigungsmail eingehen, bitte auch im Spam-Ordner nachsehen.').classes('text-sm mt-2')
+
+    # === Preis-, Kapazitäts- & Bild-Update ===
+    def update_camp_status(_=None, current=None):
+        """Aktualisiert Verfügbarkeit, Preis und Bild. Ohne Teilnehmerzahl bleibt die Verfügbarkeit ausgeblendet."""
+        selected = camp.value
+        max_cap = CATALOG['caps'].get(selected)
+        remaining = (max_cap - current) if max_cap and current is not None else None
+
+        # --- Verfügbarkeit ---
+        if remaining is None:
+            camp_status_label.text = ''
+            submit_btn.enabled = pending['ticket'] is None
+        elif remaining <= 0:
+            camp_status_label.text = f'❌ Camp ausgebucht ({current}/{max_cap})'
+            camp_status_label.classes(replace='text-lg mt-2 font-bold text-red-700')
+            submit_btn.enabled = False
+        else:
+            color_class = 'text-green-700' if remaining > 5 else 'text-orange-600'
+            camp_status_label.text = f'✅ Noch {remaining} Plätze frei ({current}/{max_cap})'
+            camp_status_label.classes(replace=f'text-lg mt-2 font-bold {color_class}')
+            submit_btn.enabled = pending['ticket'] is None
+
+        # --- Preis anzeigen ---
+        base = CATALOG['prices'].get(selected)
+        camp_preis_label.text = f'💰 Teilnahmegebühr: {base:.2f} €' if base is not None else ''
+
+        # --- Bild anzeigen ---
+        img_url = CATALOG['images'].get(selected)
+        if img_url:
+            camp_image.set_source(img_url)
+            camp_image.visible = True
+        else:
+            camp_image.visible = False
 
-    camp_names = get_camp_names() or ['Camp-Auswahl']
-    camp_prices = get_camp_prices()
-    camp_caps = get_camp_capacities()
-    camp_images = get_camp_images()  # <--- NEU: Bilder laden
+    async def refresh_camp_status(_=None):
+        """Zeigt Preis und Bild sofort an und lädt die Teilnehmerzahl, ohne den Event-Loop zu blockieren."""
+        selected = camp.value
+        update_camp_status()
+        try:
+            current = await run.io_bound(get_registered_count, selected)
+        except Exception as e:
+            print(f'⚠️ Teilnehmerzahl für {selected} nicht abrufbar: {e}')
+            return
+        if camp.value == selected:  # sonst zeigt der Abruf der neuen Auswahl das Ergebnis
+            update_camp_status(current=current)
 
-    camp = ui.select(
-        camp_names,
-        value=camp_names[0] if camp_names else None,
-        label='Camp'
-    ).classes('w-full text-lg required')
+    camp.on('update:model-value', refresh_camp_status)
+    ui.timer(0, refresh_camp_status, once=True)
 
-    camp_status_label = ui.label('').classes('text-lg mt-2 font-bold text-red-700')
-    camp_preis_label = ui.label('').classes('text-lg mt-1 text-blue-800 font-bold')
+    # === Katalog-Änderungen (Watcher) live übernehmen ===
+    async def on_catalog_change():
+        names = CATALOG['names'] or ['Camp-Auswahl']
+        camp.set_options(names, value=camp.value if camp.value in names else names[0])
+        await refresh_camp_status()
 
-    # 🖼️ Camp-Bild (automatisch je nach Auswahl)
-    camp_image = ui.image().classes('w-full rounded-xl shadow-lg mt-4').style(
-        'max-width:500px; border-radius:1rem; display:block; margin:auto; transition:opacity 0.6s ease-in-out;'
-    )
-    camp_image.visible = False  # erst sichtbar, wenn Auswahl getroffen wurde
-
-    ui.html('<hr>', sanitize=False)
-
-    # === TEILNEHMERDATEN & AGB ===
-    with ui.column().classes('mainblock mt-2'):
-        with ui.row():
-            vorname = ui.input('Vorname').classes('w-full required')
-            nachname = ui.input('Nachname').classes('w-full required')
-        with ui.row():
-            alter = ui.input('Alter').classes('w-full required')
-            telefon = ui.input('Telefonnummer (Notfall)').classes('w-full required')
-        with ui.row():
-            email = ui.input('E-Mail (für Bestätigung)').classes('w-full required')
-            frueh = ui.select(
-                ['Keine', 'ab 08:00 Uhr (plus 15 Euro)'],
-                value='Keine',
-                label='Frühbetreuung'
-            ).classes('w-full required')
-
-        allergien = ui.input('Allergien / Besonderheiten').classes('w-full')
-        anmerkung = ui.input('Anmerkung').classes('w-full')
-
-        ui.label('* Pflichtfelder').style('color: red; font-size: 0.9rem; margin-top: 0.5rem;')
-
-        # === AGB ===
-        agb_checkbox = ui.checkbox('Ich habe die AGB gelesen und akzeptiere sie.').classes('required')
-        agb_expansion = ui.expansion('📄 AGB ausklappen').classes('w-full mt-2 text-blue-900 font-semibold')
-        with agb_expansion:
-            ui.markdown("""
-**für die Teilnahme an Fußballcamps der Fußballschule Bremer SV**
-
-1. **Veranstalter**  
-Veranstalter der Fußballcamps ist die Fußballschule Bremer SV, Hohweg 48–50, 28219 Bremen (nachfolgend „Veranstalter“ genannt).
-
-2. **Anmeldung und Vertragsschluss**  
-Die Anmeldung erfolgt über das Online-Formular oder schriftlich.  
-Mit der Bestätigung durch den Veranstalter (per E-Mail) kommt der Teilnahmevertrag zustande.  
-Die Teilnahmeplätze werden in der Reihenfolge der Anmeldungen vergeben.
-
-3. **Teilnahmegebühr und Zahlung**  
-Die Teilnahmegebühr ist dem jeweiligen Camp-Angebot zu entnehmen.  
-Die Zahlung erfolgt gemäß der in der Anmeldebestätigung genannten Zahlungsweise (z. B. Barzahlung am ersten Camptag oder Überweisung vorab).  
-Eine Teilnahme ist nur bei vollständiger Zahlung möglich.
-
-4. **Rücktritt / Stornierung durch Teilnehmer**  
-Ein Rücktritt ist bis 14 Tage vor Campbeginn kostenfrei möglich.  
-Bei späterer Absage bis 7 Tage vor Beginn werden 50 % der Teilnahmegebühr fällig.  
-Bei Absage innerhalb von 7 Tagen vor Campbeginn oder Nichterscheinen ist der volle Betrag zu zahlen.  
-Eine Erstattung bei vorzeitigem Abbruch des Camps ist ausgeschlossen.
-
-5. **Absage oder Änderung durch den Veranstalter**  
-Der Veranstalter behält sich vor, das Camp aus wichtigen Gründen (z. B. zu geringe Teilnehmerzahl, Krankheit, höhere Gewalt, behördliche Anordnung) abzusagen oder zu verschieben.  
-In diesem Fall wird die Teilnahmegebühr vollständig erstattet. Weitere Ansprüche bestehen nicht.
-
-6. **Haftung**  
-Die Teilnahme erfolgt auf eigene Gefahr.  
-Der Veranstalter haftet nur für Schäden, die auf vorsätzliches oder grob fahrlässiges Verhalten seiner Mitarbeiter oder Erfüllungsgehilfen zurückzuführen sind.  
-Für mitgebrachte Gegenstände, Kleidung oder Wertsachen wird keine Haftung übernommen.  
-Eine private Unfall- und Haftpflichtversicherung wird empfohlen.
-
-7. **Gesundheitszustand**  
-Mit der Anmeldung bestätigen die Erziehungsberechtigten, dass das Kind körperlich gesund und sportlich belastbar ist.  
-Eventuelle gesundheitliche Einschränkungen, Allergien oder notwendige Medikamente sind bei der Anmeldung anzugeben.
-
-8. **Foto- und Videoaufnahmen**  
-Während der Camps können Foto- und Videoaufnahmen gemacht werden.  
-Diese dürfen vom Veranstalter für Vereinszwecke, Berichterstattung und Öffentlichkeitsarbeit (z. B. Website, Social Media, Printmedien) verwendet werden.  
-Sollte dies nicht gewünscht sein, ist der Veranstalter vor Campbeginn schriftlich zu informieren.
-
-9. **Datenschutz**  
-Die erhobenen Daten werden ausschließlich zur Durchführung des Camps und zur Kommunikation im Rahmen der Veranstaltung genutzt.  
-Eine Weitergabe an Dritte erfolgt nicht.  
-Weitere Informationen zum Datenschutz sind in der Datenschutzerklärung unter www.bremer-sv.de/datenschutz abrufbar.
-
-10. **Salvatorische Klausel**  
-Sollten einzelne Bestimmungen dieser AGB unwirksam sein, bleibt die Wirksamkeit der übrigen Bestimmungen unberührt.
-
-11. **Gerichtsstand**  
-Es gilt deutsches Recht. Gerichtsstand ist – soweit zulässig – Bremen.
-
-📅 *Stand: Oktober 2025*  
-*Fußballschule Bremer SV – gemeinsam kicken, lernen, wachsen.*
-            """).classes('text-sm leading-relaxed text-left')
-
-        # === ABSENDEN ===
-        submit_btn = ui.button('JETZT ANMELDEN', on_click=anmelden).classes('button w-full mt-4')
-        submit_btn.bind_enabled_from(agb_checkbox, 'value')
-
-        ui.label('💡 Sollte keine Bestätigungsmail eingehen, bitte auch im Spam-Ordner nachsehen.').classes('text-sm mt-2')
-
-# === Preis-, Kapazitäts- & Bild-Update ===
-def update_camp_status(_=None):
-    selected = camp.value
-    max_cap = camp_caps.get(selected)
-    current = get_registered_count(selected)
-    remaining = (max_cap - current) if max_cap else None
-
-    # --- Verfügbarkeit ---
-    if remaining is None:
-        camp_status_label.text = ''
-        submit_btn.enabled = True
-    elif remaining <= 0:
-        camp_status_label.text = f'❌ Camp ausgebucht ({current}/{max_cap})'
-        camp_status_label.classes(replace='text-lg mt-2 font-bold text-red-700')
-        submit_btn.enabled = False
-    else:
-        color_class = 'text-green-700' if remaining > 5 else 'text-orange-600'
-        camp_status_label.text = f'✅ Noch {remaining} Plätze frei ({current}/{max_cap})'
-        camp_status_label.classes(replace=f'text-lg mt-2 font-bold {color_class}')
-        submit_btn.enabled = True
-
-    # --- Preis anzeigen ---
-    base = camp_prices.get(selected)
-    camp_preis_label.text = f'💰 Teilnahmegebühr: {base:.2f} €' if base is not None else ''
-
-    # --- Bild anzeigen ---
-    img_url = camp_images.get(selected)
-    if img_url:
-        camp_image.set_source(img_url)
-        camp_image.visible = True
-    else:
-        camp_image.visible = False
+    catalog.subscribe(on_catalog_change)
+    ui.context.client.on_delete(lambda: catalog.unsubscribe(on_catalog_change))
 
-camp.on('update:model-value', update_camp_status)
-update_camp_status()
+# =========================
+#   ADMIN: PERFORMANCE-ÜBERSICHT
+# =========================
+def _fmt_ms(value):
+    return '-' if value is None else f'{value:.0f} ms'
+
+
+@ui.page('/admin/performance')
+def admin_performance(token: str = ''):
+    """Zeigt Latenz-Histogramme je Stufe, den Event-Loop-Lag und den Sampling-Profiler."""
+    if not admin_access_ok(token):
+        ui.label('⛔ Zugriff verweigert.').classes('text-2xl font-bold')
+        return
+
+    with ui.column().classes('mainblock').style('max-width: 1100px;'):
+        ui.label('⏱️ Performance-Übersicht').classes('text-3xl font-bold')
+        ui.html('<hr>', sanitize=False)
+
+        columns = [
+            {'name': 'stufe', 'label': 'Stufe', 'field': 'stufe', 'align': 'left'},
+            {'name': 'anzahl', 'label': 'Anzahl', 'field': 'anzahl'},
+            {'name': 'fehler', 'label': 'Fehler', 'field': 'fehler'},
+            {'name': 'avg', 'label': 'Ø', 'field': 'avg'},
+            {'name': 'p50', 'label': 'p50', 'field': 'p50'},
+            {'name': 'p95', 'label': 'p95', 'field': 'p95'},
+            {'name': 'p99', 'label': 'p99', 'field': 'p99'},
+            {'name': 'max', 'label': 'Max', 'field': 'max'},
+            {'name': 'verteilung', 'label': 'Verteilung (≤5 ms … >10 s)', 'field': 'verteilung', 'align': 'left'},
+        ]
+        stage_table = ui.table(columns=columns, rows=[], row_key='stufe').classes('w-full')
+
+        with ui.row().classes('items-center mt-4'):
+            profiler_switch = ui.switch('Sampling-Profiler aktiv', value=PROFILER.running)
+            ui.button('Profil zurücksetzen', on_click=lambda: PROFILER.reset())
+        profile_label = ui.label('').classes('text-sm')
+        profile_table = ui.table(
+            columns=[
+                {'name': 'anteil', 'label': 'Anteil', 'field': 'anteil'},
+                {'name': 'stack', 'label': 'Stack (innen ← außen)', 'field': 'stack', 'align': 'left'},
+            ],
+            rows=[],
+        ).classes('w-full text-xs')
+
+    def toggle_profiler(e):
+        if e.value:
+            PROFILER.start()
+        else:
+            PROFILER.stop()
+
+    profiler_switch.on_value_change(toggle_profiler)
+
+    def refresh():
+        rows = []
+        for name, hist in sorted(STAGE_STATS.items()):
+            snap = hist.snapshot()
+            rows.append({
+                'stufe': name,
+                'anzahl': snap['anzahl'],
+                'fehler': snap['fehler'],
+                'avg': _fmt_ms(snap['avg_ms']),
+                'p50': _fmt_ms(hist.percentile(50)),
+                'p95': _fmt_ms(hist.percentile(95)),
+                'p99': _fmt_ms(hist.percentile(99)),
+                'max': _fmt_ms(snap['max_ms']),
+                'verteilung': ' '.join(str(c) for c in snap['buckets']),
+            })
+        stage_table.rows = rows
+        stage_table.update()
+
+        total, top = PROFILER.top()
+        profile_label.text = f'{total} Samples' + (' (läuft)' if PROFILER.running else '')
+        profile_table.rows = [
+            {'anteil': f'{count / total * 100:.1f} %', 'stack': stack}
+            for stack, count in top
+        ] if total else []
+        profile_table.update()
+
+    refresh()
+    ui.timer(2.0, refresh)
 
 # =========================
-#   PRE-WARM-TASK
+#   ADMIN: CAMP-DASHBOARD
 # =========================
-import asyncio
+@ui.page('/admin/dashboard')
+def admin_dashboard(token: str = ''):
+    """Zeigt Umsatz, Frühbetreuung, Altersverteilung und Allergien je Camp – nur aus camp_stats."""
+    if not admin_access_ok(token):
+        ui.label('⛔ Zugriff verweigert.').classes('text-2xl font-bold')
+        return
+
+    @ui.refreshable
+    def render():
+        snapshot = camp_stats.snapshot()
+        stand = camp_stats.RECONCILED_AT['zeit']
+        ui.label(
+            f'Letzter Abgleich: {stand.strftime("%d.%m.%Y %H:%M:%S")}' if stand else 'Noch kein Abgleich erfolgt.'
+        ).classes('text-sm')
+
+        gesamt = sum(stats['umsatz'] for stats in snapshot.values())
+        ui.label(f'💶 Gesamtumsatz: {gesamt:.2f} €').classes('text-xl font-bold')
+
+        for name in sorted(snapshot):
+            stats = snapshot[name]
+            max_cap = CATALOG['caps'].get(name)
+            belegung = f'{stats["anmeldungen"]}/{max_cap}' if max_cap else str(stats['anmeldungen'])
+            with ui.card().classes('w-full text-left mt-2'):
+                ui.label(f'🏕️ {name}').classes('text-xl font-bold')
+                ui.label(f'👥 Anmeldungen: {belegung}')
+                ui.label(f'💶 Umsatz: {stats["umsatz"]:.2f} €')
+                ui.label(f'🕗 Frühbetreuung: {stats["fruehbetreuung"]}')
+                alter = ', '.join(
+                    f'{a} J.: {n}' for a, n in sorted(stats['alter'].items(), key=lambda item: str(item[0]).zfill(3))
+                )
+                ui.label(f'🎂 Alter: {alter or "-"}')
+                if stats['allergien']:
+                    ui.label('⚕️ Allergien / Besonderheiten:').classes('font-semibold')
+                    for eintrag in stats['allergien']:
+                        ui.label(f'• {eintrag}').classes('text-sm')
+
+    with ui.column().classes('mainblock').style('max-width: 900px;'):
+        ui.label('📊 Camp-Dashboard').classes('text-3xl font-bold')
+        ui.html('<hr>', sanitize=False)
+        render()
 
+    ui.timer(10.0, render.refresh)
+
+# =========================
+#   PRE-WARM-TASK
+# =========================
 async def prewarm_app():
     """Initialisiert Ressourcen, damit die App nach Render-Start sofort reagiert."""
     print("🧠 Pre-Warm-Task gestartet – initialisiere wichtige Komponenten...")
 
     try:
-        # 1️⃣ Google Sheets vorladen
+        # 1️⃣ Katalog prüfen (wird vom Katalog-Watcher aktuell gehalten)
         try:
-            camp_names = get_camp_names()
-            camp_prices = get_camp_prices()
-            camp_caps = get_camp_capacities()
+            camp_names = CATALOG['names']
+            camp_prices = CATALOG['prices']
+            camp_caps = CATALOG['caps']
 
             print(f"📋 Camps geladen: {len(camp_names)}")
             print(f"💰 Preislisten geladen: {len(camp_prices)}")
@@ -761,7 +1226,13 @@ async def prewarm_app():
 
 
 # Task nach App-Start ausführen
-asyncio.get_event_loop().create_task(prewarm_app())
+app.on_startup(prewarm_app)
+app.on_startup(monitor_loop_lag)
+app.on_startup(watch_catalog)
+app.on_startup(reconcile_stats_loop)
+app.on_startup(lambda: ADMISSION.run(
+    reserve_place, send_registration_mails, ADMISSION_QUEUE_MAX, ADMISSION_MAIL_CONCURRENCY
+))
 
 # =========================
 #   START SERVER
@@ -0,0 +1,99 @@
+"""Inkrementell gepflegte Kennzahlen je Camp (Anmeldungen, Umsatz, Frühbetreuung, Alter, Allergien).
+
+Eigenes Modul, damit Anmeldung, Abgleich und Dashboard dieselben Zahlen sehen.
+Jede Anmeldung wird in O(1) eingetragen; der periodische Abgleich mit den Sheets ersetzt den
+Stand, ohne Anmeldungen zu verlieren, die während des Einlesens eingetragen wurden.
+"""
+import threading
+from collections import Counter
+from datetime import datetime
+
+CAMP_STATS = {}
+RECONCILED_AT = {'zeit': None}
+
+_lock = threading.Lock()
+_pending = None  # während eines Abgleichs: seitdem eingetragene Anmeldungen
+
+
+def empty_camp_stats():
+    return {'anmeldungen': 0, 'umsatz': 0.0, 'fruehbetreuung': 0, 'alter': Counter(), 'allergien': []}
+
+
+def row_key(vorname, nachname, zeitstempel):
+    """Erkennt eine Anmeldung im Camp-Blatt wieder (für den Abgleich)."""
+    return ((vorname or '').strip(), (nachname or '').strip(), (zeitstempel or '').strip())
+
+
+def add_to_stats(stats, vorname, nachname, alter, frueh, allergien, preis):
+    stats['anmeldungen'] += 1
+    stats['umsatz'] += preis
+    if '08:00' in (frueh or ''):
+        stats['fruehbetreuung'] += 1
+    alter = (alter or '').strip()
+    stats['alter'][int(alter) if alter.isdigit() else '?'] += 1
+    allergien = (allergien or '').strip()
+    if allergien and allergien.lower() not in ('keine', '-'):
+        stats['allergien'].append(f'{vorname} {nachname}: {allergien}')
+
+
+def record_registration(camp_name, vorname, nachname, alter, frueh, allergien, preis, zeitstempel=''):
+    """Trägt eine neue Anmeldung in O(1) in die Statistik ein – ohne Sheet-Zugriff."""
+    with _lock:
+        stats = CAMP_STATS.setdefault(camp_name, empty_camp_stats())
+        add_to_stats(stats, vorname, nachname, alter, frueh, allergien, preis)
+        if _pending is not None:
+            _pending.append((camp_name, row_key(vorname, nachname, zeitstempel),
+                             (vorname, nachname, alter, frueh, allergien, preis)))
+
+
+def begin_reconcile():
+    """Vor dem Einlesen der Sheets aufrufen: ab jetzt eingetragene Anmeldungen werden vorgemerkt."""
+    global _pending
+    with _lock:
+        _pending = []
+
+
+def abort_reconcile():
+    """Einlesen fehlgeschlagen: bisherigen Stand behalten, Vormerkungen verwerfen."""
+    global _pending
+    with _lock:
+        _pending = None
+
+
+def finish_reconcile(fresh, row_keys):
+    """Übernimmt den neu eingelesenen Stand.
+
+    fresh:    Camp → neu berechnete Statistik
+    row_keys: Camp → Menge der row_key() aller eingelesenen Zeilen
+
+    Camps, die nicht eingelesen wurden (Blatt nicht lesbar oder noch nicht im Katalog, z. B. ein
+    gerade von save_to_sheet angelegtes Blatt), behalten ihren bisherigen Stand samt Vormerkungen.
+    """
+    global _pending
+    with _lock:
+        pending, _pending = _pending or [], None
+
+        # Anmeldungen, die erst nach dem Einlesen ihres Blatts geschrieben wurden, obendrauf setzen
+        for camp_name, key, args in pending:
+            if camp_name in fresh and key not in row_keys.get(camp_name, ()):
+                add_to_stats(fresh[camp_name], *args)
+
+        for camp_name, stats in CAMP_STATS.items():
+            fresh.setdefault(camp_name, stats)
+
+        for camp_name, stats in fresh.items():
+            before = CAMP_STATS.get(camp_name, {}).get('anmeldungen')
+            if before is not None and before != stats['anmeldungen']:
+                print(f'🔁 Statistik {camp_name} abgeglichen: {before} → {stats["anmeldungen"]} Anmeldungen')
+        CAMP_STATS.clear()
+        CAMP_STATS.update(fresh)
+        RECONCILED_AT['zeit'] = datetime.now()
+
+
+def snapshot():
+    """Kopie der Statistik für die Anzeige."""
+    with _lock:
+        return {
+            name: {**stats, 'alter': dict(stats['alter']), 'allergien': list(stats['allergien'])}
+            for name, stats in CAMP_STATS.items()
+        }
@@ -0,0 +1,54 @@
+"""Gemeinsamer Camp-Katalog (Camps, Preise, Kapazitäten, Bilder).
+
+Eigenes Modul, damit alle Seiten denselben Stand sehen. Geöffnete Seiten melden sich
+per subscribe() an und werden bei jeder Katalog-Änderung benachrichtigt.
+"""
+import asyncio
+
+from nicegui import background_tasks
+
+# Aktueller Stand – wird nur über publish() ersetzt
+CATALOG = {'names': [], 'prices': {}, 'caps': {}, 'images': {}}
+
+# Zuletzt erfolgreich geladene Revision (Drive-Änderungszeitpunkt und Blattnamen)
+REVISION = {'modified': None, 'titles': None}
+
+_subscribers = []
+
+
+def subscribe(callback):
+    """Registriert einen Callback (sync oder async), der nach jeder Änderung aufgerufen wird."""
+    _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def publish(new_catalog):
+    """Übernimmt einen neuen Katalogstand und benachrichtigt alle angemeldeten Seiten."""
+    CATALOG.update(new_catalog)
+    for callback in list(_subscribers):
+        try:
+            result = callback()
+            if asyncio.iscoroutine(result):
+                background_tasks.create(result, name='catalog subscriber')
+        except Exception as e:
+            print(f'⚠️ Fehler beim Aktualisieren einer Seite: {e}')
+
+
+def diff_catalog(old, new):
+    """Liefert eine lesbare Liste der Änderungen zwischen zwei Katalogständen."""
+    changes = []
+    added = set(new['names']) - set(old['names'])
+    removed = set(old['names']) - set(new['names'])
+    if added:
+        changes.append(f'neue Camps: {sorted(added)}')
+    if removed:
+        changes.append(f'entfernte Camps: {sorted(removed)}')
+    for key, label in (('prices', 'Preis'), ('caps', 'Kapazität'), ('images', 'Bild')):
+        for name in sorted(set(old[key]) | set(new[key])):
+            if old[key].get(name) != new[key].get(name):
+                changes.append(f'{label} {name}: {old[key].get(name)} → {new[key].get(name)}')
+    return changes
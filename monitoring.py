@@ -0,0 +1,186 @@
+# =========================
+#   PERFORMANCE-MONITORING (Stufen-Latenzen, Loop-Lag, Sampling-Profiler)
+# =========================
+"""Stufen-Latenzen, Event-Loop-Lag und Sampling-Profiler.
+
+Eigenes Modul, damit alle Seiten und Hintergrund-Tasks dieselben Messwerte sehen.
+"""
+import asyncio
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Bucket-Obergrenzen in Millisekunden (letzter Bucket = alles darüber)
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+
+
+class LatencyHistogram:
+    """Sammelt Laufzeiten einer Stufe in festen Buckets (speicherschonend, thread-sicher)."""
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, duration_ms, error=False):
+        with self._lock:
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if duration_ms <= bound:
+                    self.counts[i] += 1
+                    break
+            self.total += 1
+            self.sum_ms += duration_ms
+            self.max_ms = max(self.max_ms, duration_ms)
+            if error:
+                self.errors += 1
+
+    def percentile(self, p):
+        """Schätzt das p-Perzentil (0–100) über die Bucket-Obergrenze."""
+        with self._lock:
+            if not self.total:
+                return None
+            threshold = self.total * p / 100
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= threshold:
+                    bound = LATENCY_BUCKETS_MS[i]
+                    return self.max_ms if bound == float('inf') else min(bound, self.max_ms)
+            return self.max_ms
+
+    def snapshot(self):
+        with self._lock:
+            avg = self.sum_ms / self.total if self.total else 0.0
+            return {
+                'anzahl': self.total,
+                'fehler': self.errors,
+                'avg_ms': avg,
+                'max_ms': self.max_ms,
+                'buckets': list(self.counts),
+            }
+
+
+STAGE_STATS = {}
+_STAGE_STATS_LOCK = threading.Lock()
+
+
+def get_stage_histogram(name):
+    with _STAGE_STATS_LOCK:
+        if name not in STAGE_STATS:
+            STAGE_STATS[name] = LatencyHistogram()
+        return STAGE_STATS[name]
+
+
+@contextmanager
+def measure_stage(name):
+    """Misst die Dauer einer Stufe der Anmeldung (z. B. 'save_to_sheet') und trägt sie ins Histogramm ein."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        get_stage_histogram(name).record(duration_ms, error=error)
+        if duration_ms > 2000:
+            logging.warning(f'🐢 Langsame Stufe {name}: {duration_ms:.0f} ms')
+
+
+# --- Event-Loop-Lag ---
+LOOP_LAG_INTERVAL = 0.5  # Sekunden
+_LOOP_THREAD_ID = None
+
+
+async def monitor_loop_lag():
+    """Misst, wie stark sich ein kurzer Sleep verspätet – blockierender Code im Event-Loop wird so sichtbar."""
+    global _LOOP_THREAD_ID
+    _LOOP_THREAD_ID = threading.get_ident()
+    print('⏱️ Loop-Lag-Monitor gestartet.')
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag_ms = max(0.0, (time.perf_counter() - start - LOOP_LAG_INTERVAL) * 1000)
+        get_stage_histogram('event_loop_lag').record(lag_ms)
+        if lag_ms > 1000:
+            logging.warning(f'🐢 Event-Loop blockiert: {lag_ms:.0f} ms')
+
+
+# --- Sampling-Profiler (zur Laufzeit ein-/ausschaltbar) ---
+class SamplingProfiler:
+    """Nimmt in einem Hintergrund-Thread regelmäßig den Stack des Event-Loop-Threads auf."""
+
+    def __init__(self, interval=0.01, max_depth=12, max_stacks=500):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks  # begrenzt den Speicher, solange der Profiler läuft
+        self.samples = Counter()
+        self.total_samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        print('🔬 Sampling-Profiler gestartet.')
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+        print('🔬 Sampling-Profiler gestoppt.')
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.total_samples = 0
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            thread_id = _LOOP_THREAD_ID or threading.main_thread().ident
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            key = ' ← '.join(stack)
+            with self._lock:
+                self.total_samples += 1
+                if key in self.samples or len(self.samples) < self.max_stacks:
+                    self.samples[key] += 1
+                else:
+                    self.samples['(weitere Stacks)'] += 1
+
+    def top(self, n=15):
+        with self._lock:
+            return self.total_samples, self.samples.most_common(n)
+
+
+PROFILER = SamplingProfiler()
+
+
+def admin_access_ok(token):
+    """Admin-Seiten sind nur mit gesetztem ADMIN_TOKEN und passendem ?token=... erreichbar."""
+    expected = os.environ.get('ADMIN_TOKEN')
+    return bool(expected) and hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
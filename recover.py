@@ -0,0 +1,181 @@
+# =========================
+#   WIEDERHERSTELLUNG UNVOLLSTÄNDIGER ANMELDUNGEN
+# =========================
+"""Liest das Anmelde-Journal, findet unvollständige Anmeldungen und holt nur die fehlenden Stufen nach.
+
+Beispiele:
+    python recover.py --dry-run
+    python recover.py --journal data/anmeldungen.journal --batch-size 20 --workers 4
+    python recover.py --since "01.11.2025 00:00:00"
+    python recover.py --compact 90
+
+Wiederholungen sind idempotent: Der Sheet-Eintrag wird vorher anhand von Vorname, Nachname und
+Zeitstempel im Camp-Blatt gesucht, und jede erfolgreiche Stufe wird im Journal vermerkt, sodass
+ein erneuter Lauf sie überspringt.
+
+Achtung bei laufender App: Anmeldungen, die gerade noch in der Warteschlange stehen, haben im
+Journal noch keinen Stufenstatus und sehen unvollständig aus. Damit recover.py sie nicht parallel
+zum Admission-Worker ins Sheet schreibt, werden Anmeldungen jünger als --min-age Minuten
+(Standard: 10) übersprungen. Am sichersten läuft die Wiederherstellung bei gestoppter App.
+
+--compact TAGE entfernt abgeschlossene Anmeldungen, die älter als TAGE Tage sind, aus dem Journal
+(Datenschutz, AGB §9) und beendet sich danach. Offene Anmeldungen bleiben erhalten. Auch das
+sollte bei gestoppter App laufen, sonst kann eine genau beim Ersetzen der Datei geschriebene
+Zeile verloren gehen.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from gspread.exceptions import WorksheetNotFound
+
+import anmelde_journal
+from anmelde_journal import STAGES, STATUS_OK, STATUS_AUSGEBUCHT, compact, default_journal_path, find_incomplete
+
+MAIL_STAGES = STAGES[1:]
+
+
+def describe(daten, done):
+    offen = [stage for stage in STAGES if done.get(stage) != STATUS_OK]
+    return (f"{daten.get('zeitstempel', '?')}  {daten.get('camp', '?')}: "
+            f"{daten.get('vorname', '')} {daten.get('nachname', '')} – offen: {', '.join(offen)}")
+
+
+class SheetIndex:
+    """Merkt sich je Camp die vorhandenen Einträge (ein Lesevorgang pro Camp und Lauf)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._rows = {}
+
+    def _key(self, vorname, nachname, zeitstempel):
+        return (vorname.strip(), nachname.strip(), zeitstempel.strip())
+
+    def _load(self, camp_name):
+        if camp_name not in self._rows:
+            # Andere Fehler (z. B. Quota) bewusst nicht abfangen – sonst würde doppelt eingetragen
+            try:
+                rows = self.app.SPREADSHEET.worksheet(camp_name).get_all_values()[1:]
+            except WorksheetNotFound:
+                rows = []
+            self._rows[camp_name] = {
+                self._key(row[0], row[1], row[8]) for row in rows if len(row) >= 9
+            }
+        return self._rows[camp_name]
+
+    def contains(self, daten):
+        key = self._key(daten['vorname'], daten['nachname'], daten.get('zeitstempel', ''))
+        return key in self._load(daten['camp'])
+
+    def add(self, daten):
+        self._load(daten['camp']).add(self._key(daten['vorname'], daten['nachname'], daten.get('zeitstempel', '')))
+
+
+def replay_sheet(app, index, daten, done):
+    """Sheet-Stufe nachholen – seriell, damit Plätze weiter in Anmelde-Reihenfolge vergeben werden."""
+    if index.contains(daten):
+        print(f"🟰 Bereits im Blatt: {daten['vorname']} {daten['nachname']} ({daten['camp']})")
+        anmelde_journal.JOURNAL.stage(daten['id'], 'sheet', STATUS_OK)
+        done['sheet'] = STATUS_OK
+        return
+    if app.is_camp_full(daten['camp']):
+        print(f"❌ Camp ausgebucht – bitte manuell klären: {daten['vorname']} {daten['nachname']} ({daten['camp']})")
+        anmelde_journal.JOURNAL.stage(daten['id'], 'sheet', STATUS_AUSGEBUCHT)
+        done['sheet'] = STATUS_AUSGEBUCHT
+        return
+    app.run_journaled_stage(daten, 'sheet', app.write_registration, daten)
+    index.add(daten)
+    done['sheet'] = STATUS_OK
+    print(f"✅ Eingetragen: {daten['vorname']} {daten['nachname']} ({daten['camp']})")
+
+
+def replay_mail(app, daten, stage):
+    fn = app.send_confirmation_mail if stage == 'bestaetigung' else app.send_notification_mail
+    app.run_journaled_stage(daten, stage, fn, daten)
+    return stage
+
+
+def replay_batch(app, index, batch, workers):
+    """Holt für einen Block die fehlenden Stufen nach. Gibt die Anzahl der Fehler zurück."""
+    fehler = 0
+    for daten, done in batch:
+        if done.get('sheet') in (STATUS_OK, STATUS_AUSGEBUCHT):
+            continue
+        try:
+            replay_sheet(app, index, daten, done)
+        except Exception as e:
+            fehler += 1
+            print(f"❌ Sheet-Eintrag fehlgeschlagen ({daten['vorname']} {daten['nachname']}): {e}")
+
+    # Mails erst, wenn der Sheet-Eintrag sicher existiert
+    jobs = [
+        (daten, stage)
+        for daten, done in batch
+        if done.get('sheet') == STATUS_OK
+        for stage in MAIL_STAGES
+        if done.get(stage) != STATUS_OK
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(daten, pool.submit(replay_mail, app, daten, stage)) for daten, stage in jobs]
+        for daten, future in futures:
+            try:
+                stage = future.result()
+                print(f"📨 {stage} nachgeholt: {daten['vorname']} {daten['nachname']}")
+            except Exception as e:
+                fehler += 1
+                print(f"❌ Mail fehlgeschlagen ({daten['vorname']} {daten['nachname']}): {e}")
+    return fehler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Unvollständige Anmeldungen aus dem Journal nachholen.')
+    parser.add_argument('--journal', default=None, help='Pfad zum Journal (Standard: config.json / JOURNAL_PATH)')
+    parser.add_argument('--since', default=None, help='nur Anmeldungen ab Zeitpunkt "TT.MM.JJJJ HH:MM:SS"')
+    parser.add_argument('--min-age', type=float, default=10,
+                        help='Anmeldungen jünger als so viele Minuten überspringen (Standard: 10)')
+    parser.add_argument('--batch-size', type=int, default=20, help='Anmeldungen pro Block (Standard: 20)')
+    parser.add_argument('--workers', type=int, default=4, help='parallele Mail-Versendungen (Standard: 4)')
+    parser.add_argument('--dry-run', action='store_true', help='nur anzeigen, nichts nachholen')
+    parser.add_argument('--compact', type=int, default=None, metavar='TAGE',
+                        help='abgeschlossene Anmeldungen älter als TAGE Tage entfernen und beenden')
+    args = parser.parse_args(argv)
+
+    journal_path = args.journal or default_journal_path()
+    if not os.path.exists(journal_path):
+        print(f'⚠️ Kein Journal gefunden: {journal_path}')
+        return 1
+
+    if args.compact is not None:
+        entfernt = compact(journal_path, datetime.now() - timedelta(days=args.compact))
+        print(f'🧹 {entfernt} abgeschlossene Anmeldung(en) älter als {args.compact} Tage entfernt.')
+        return 0
+
+    since = datetime.strptime(args.since, '%d.%m.%Y %H:%M:%S') if args.since else None
+    until = datetime.now() - timedelta(minutes=args.min_age)
+
+    offen = find_incomplete(journal_path, since=since, until=until)
+    print(f'📋 {len(offen)} unvollständige Anmeldung(en) in {journal_path}')
+    for daten, done in offen:
+        print('   ' + describe(daten, done))
+    if args.dry_run or not offen:
+        return 0
+
+    # Erst hier importieren: baut die Verbindung zu Google Sheets auf
+    anmelde_journal.JOURNAL.path = journal_path
+    import app
+
+    index = SheetIndex(app)
+    fehler = 0
+    for start in range(0, len(offen), args.batch_size):
+        batch = offen[start:start + args.batch_size]
+        print(f'🔁 Block {start // args.batch_size + 1}: {len(batch)} Anmeldung(en)')
+        fehler += replay_batch(app, index, batch, args.workers)
+
+    print(f'🏁 Fertig – {fehler} Fehler.' if fehler else '🏁 Fertig – alles nachgeholt.')
+    return 1 if fehler else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())